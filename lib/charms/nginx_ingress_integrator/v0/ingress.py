@@ -66,26 +66,30 @@ LIBAPI = 0
 
 # Increment this PATCH version before using `charmcraft publish-lib` or reset
 # to 0 if you are raising the major API version
-LIBPATCH = 12
+LIBPATCH = 15
 
 LOGGER = logging.getLogger(__name__)
 
-REQUIRED_INGRESS_RELATION_FIELDS = {"service-hostname", "service-name", "service-port"}
-
-OPTIONAL_INGRESS_RELATION_FIELDS = {
-    "additional-hostnames",
-    "limit-rps",
-    "limit-whitelist",
-    "max-body-size",
-    "owasp-modsecurity-crs",
-    "path-routes",
-    "retry-errors",
-    "rewrite-target",
-    "rewrite-enabled",
-    "service-namespace",
-    "session-cookie-max-age",
-    "tls-secret-name",
-}
+REQUIRED_INGRESS_RELATION_FIELDS = frozenset({"service-hostname", "service-name", "service-port"})
+
+OPTIONAL_INGRESS_RELATION_FIELDS = frozenset(
+    {
+        "additional-hostnames",
+        "limit-rps",
+        "limit-whitelist",
+        "max-body-size",
+        "owasp-modsecurity-crs",
+        "path-routes",
+        "retry-errors",
+        "rewrite-target",
+        "rewrite-enabled",
+        "service-namespace",
+        "session-cookie-max-age",
+        "tls-secret-name",
+    }
+)
+
+ALL_INGRESS_RELATION_FIELDS = REQUIRED_INGRESS_RELATION_FIELDS | OPTIONAL_INGRESS_RELATION_FIELDS
 
 RELATION_INTERFACES_MAPPINGS = {
     "service-hostname": "host",
@@ -144,10 +148,8 @@ class IngressRequires(Object):
         unknown = [
             config_key
             for config_key in self.config_dict
-            if config_key
-            not in REQUIRED_INGRESS_RELATION_FIELDS
-            | OPTIONAL_INGRESS_RELATION_FIELDS
-            | RELATION_INTERFACES_MAPPINGS_VALUES
+            if config_key not in ALL_INGRESS_RELATION_FIELDS
+            and config_key not in RELATION_INTERFACES_MAPPINGS_VALUES
         ]
         if unknown:
             LOGGER.error(
@@ -215,18 +217,11 @@ class IngressProvides(Object):
         if not self.model.unit.is_leader():
             return
 
-        ingress_data = {
-            field: event.relation.data[event.app].get(field)
-            for field in REQUIRED_INGRESS_RELATION_FIELDS | OPTIONAL_INGRESS_RELATION_FIELDS
-        }
+        relation_data = event.relation.data[event.app]
+        ingress_data = {field: relation_data.get(field) for field in ALL_INGRESS_RELATION_FIELDS}
 
-        missing_fields = sorted(
-            [
-                field
-                for field in REQUIRED_INGRESS_RELATION_FIELDS
-                if ingress_data.get(field) is None
-            ]
-        )
+        present_fields = {field for field, value in ingress_data.items() if value is not None}
+        missing_fields = sorted(REQUIRED_INGRESS_RELATION_FIELDS - present_fields)
 
         if missing_fields:
             LOGGER.error(
@@ -2,8 +2,12 @@
 # Copyright 2022 Canonical Ltd.
 # See LICENSE file for licensing details.
 
+import functools
+import hashlib
+import json
 import logging
 import re
+import socket
 import time
 
 import kubernetes.client
@@ -14,22 +18,81 @@ from charms.nginx_ingress_integrator.v0.ingress import (
     IngressProvides,
 )
 from ops.charm import CharmBase
+from ops.framework import StoredState
 from ops.main import main
 from ops.model import ActiveStatus, BlockedStatus
+from urllib3.connection import HTTPConnection
 
 LOGGER = logging.getLogger(__name__)
 _INGRESS_SUB_REGEX = re.compile("[^0-9a-zA-Z]")
 BOOLEAN_CONFIG_FIELDS = ["rewrite-enabled"]
-
-
-def _core_v1_api():
+# The field manager used for server-side apply requests.
+FIELD_MANAGER = "nginx-ingress-integrator"
+# The field manager the API server recorded, from the kubernetes client's user agent, for the
+# resources defined before the charm used server-side apply.
+LEGACY_FIELD_MANAGER = "OpenAPI-Generator"
+# The maximum number of connections kept open to the kubernetes API server.
+CONNECTION_POOL_MAXSIZE = 8
+# Fixed ingress annotations, set when the matching feature is enabled.
+_OWASP_MODSECURITY_CRS_ANNOTATIONS = {
+    "nginx.ingress.kubernetes.io/enable-modsecurity": "true",
+    "nginx.ingress.kubernetes.io/enable-owasp-modsecurity-crs": "true",
+    "nginx.ingress.kubernetes.io/modsecurity-snippet": (
+        "SecRuleEngine On\nInclude /etc/nginx/owasp-modsecurity-crs/nginx-modsecurity.conf"
+    ),
+}
+_SESSION_COOKIE_ANNOTATIONS = {
+    "nginx.ingress.kubernetes.io/affinity": "cookie",
+    "nginx.ingress.kubernetes.io/affinity-mode": "balanced",
+    "nginx.ingress.kubernetes.io/session-cookie-change-on-failure": "true",
+    "nginx.ingress.kubernetes.io/session-cookie-samesite": "Lax",
+}
+
+
+class _ApiClient(kubernetes.client.ApiClient):
+    """Kubernetes ApiClient sending PATCH requests as server-side apply requests."""
+
+    def select_header_content_type(self, content_types):
+        """Prefer server-side apply if the request supports it."""
+        if "application/apply-patch+yaml" in content_types:
+            return "application/apply-patch+yaml"
+        return super().select_header_content_type(content_types)
+
+
+def _tcp_keepalive_socket_options():
+    """Return the socket options for connections to the kubernetes API, with TCP keepalive.
+
+    This stops idle connections to the API server from being silently dropped by load
+    balancers along the way.
+    """
+    socket_options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # The TCP_KEEP* options aren't available on all platforms.
+    for option_name, value in (("TCP_KEEPIDLE", 120), ("TCP_KEEPINTVL", 30), ("TCP_KEEPCNT", 6)):
+        if hasattr(socket, option_name):
+            socket_options.append((socket.IPPROTO_TCP, getattr(socket, option_name), value))
+    return HTTPConnection.default_socket_options + socket_options
+
+
+def _merge_fields(fields, other_fields):
+    """Merge a set of managed fields, in the FieldsV1 format, into another one."""
+    for key, value in other_fields.items():
+        _merge_fields(fields.setdefault(key, {}), value)
+    return fields
+
+
+def _body_hash(body):
+    """Return a digest of a serialized resource definition."""
+    return hashlib.blake2b(body.encode(), digest_size=16).hexdigest()
+
+
+def _core_v1_api(api_client=None):
     """Use the v1 k8s API."""
-    return kubernetes.client.CoreV1Api()
+    return kubernetes.client.CoreV1Api(api_client)
 
 
-def _networking_v1_api():
-    """Use the v1 beta1 networking API."""
-    return kubernetes.client.NetworkingV1Api()
+def _networking_v1_api(api_client=None):
+    """Use the v1 networking API."""
+    return kubernetes.client.NetworkingV1Api(api_client)
 
 
 class ConflictingAnnotationsException(Exception):
@@ -41,7 +104,11 @@ class ConflictingRoutesException(Exception):
 
 
 class _ConfigOrRelation(object):
-    """Class containing data from the Charm configuration, or from a relation."""
+    """Class containing data from the Charm configuration, or from a relation.
+
+    The derived properties are computed once per object, so a _ConfigOrRelation is meant to be
+    used within a single hook and discarded.
+    """
 
     def __init__(self, model, config, relation, multiple_relations):
         """Creates a _ConfigOrRelation Object.
@@ -69,23 +136,24 @@ class _ConfigOrRelation(object):
 
         return None
 
+    @functools.cached_property
+    def _relation_data(self):
+        """Return a snapshot of the relation's application data, if any."""
+        # The remote application isn't always known, e.g. when the relation is broken.
+        if self.relation is None or self.relation.app is None:
+            return {}
+        return dict(self.relation.data[self.relation.app])
+
     def _get_relation(self, field):
         """Helper method to get data from the relation, if any."""
-        if self.relation:
-            try:
-                # We want to prioritise relation-interfaces data if we have it.
-                if field in RELATION_INTERFACES_MAPPINGS:
-                    new_field = RELATION_INTERFACES_MAPPINGS[field]
-                    try:
-                        return self.relation.data[self.relation.app][new_field]
-                    except KeyError:
-                        return self.relation.data[self.relation.app][field]
-                else:
-                    return self.relation.data[self.relation.app][field]
-            except KeyError:
-                # Our relation isn't passing the information we're querying.
-                return None
-        return None
+        relation_data = self._relation_data
+        # We want to prioritise relation-interfaces data if we have it.
+        if field in RELATION_INTERFACES_MAPPINGS:
+            data = relation_data.get(RELATION_INTERFACES_MAPPINGS[field])
+            if data is not None:
+                return data
+        # This is None if our relation isn't passing the information we're querying.
+        return relation_data.get(field)
 
     def _get_config_or_relation_data(self, field, fallback):
         """Helper method to get data from config or the ingress relation, in that order."""
@@ -111,7 +179,7 @@ class _ConfigOrRelation(object):
 
         return fallback
 
-    @property
+    @functools.cached_property
     def _k8s_service_name(self):
         """Return a service name for the use creating a k8s service."""
         # Avoid collision with service name created by Juju. Currently
@@ -119,7 +187,7 @@ class _ConfigOrRelation(object):
         # need to create a separate one.
         return "{}-service".format(self._service_name)
 
-    @property
+    @functools.cached_property
     def _ingress_name(self):
         """Return an ingress name for use creating a k8s ingress."""
         # If there are 2 or more services configured to use the same service-hostname, the
@@ -131,7 +199,7 @@ class _ConfigOrRelation(object):
         ingress_name = _INGRESS_SUB_REGEX.sub("-", svc_hostname)
         return "{}-ingress".format(ingress_name)
 
-    @property
+    @functools.cached_property
     def _limit_rps(self):
         """Return limit-rps value from config or relation."""
         limit_rps = self._get_config_or_relation_data("limit-rps", 0)
@@ -140,23 +208,23 @@ class _ConfigOrRelation(object):
         # Don't return "0" which would evaluate to True.
         return ""
 
-    @property
+    @functools.cached_property
     def _limit_whitelist(self):
         """Return the limit-whitelist value from config or relation."""
         return self._get_config_or_relation_data("limit-whitelist", "")
 
-    @property
+    @functools.cached_property
     def _max_body_size(self):
         """Return the max-body-size to use for k8s ingress."""
         max_body_size = self._get_config_or_relation_data("max-body-size", 0)
         return "{}m".format(max_body_size)
 
-    @property
+    @functools.cached_property
     def _owasp_modsecurity_crs(self):
         """Return a boolean indicating whether OWASP ModSecurity CRS is enabled."""
         return self._get_config_or_relation_data("owasp-modsecurity-crs", False)
 
-    @property
+    @functools.cached_property
     def _rewrite_enabled(self):
         """Return whether rewriting should be enabled from config or relation"""
         value = self._get_config_or_relation_data("rewrite-enabled", True)
@@ -164,17 +232,17 @@ class _ConfigOrRelation(object):
         # Convert to string, then compare to a known value.
         return str(value).lower() == "true"
 
-    @property
+    @functools.cached_property
     def _rewrite_target(self):
         """Return the rewrite target from config or relation."""
         return self._get_config_or_relation_data("rewrite-target", "/")
 
-    @property
+    @functools.cached_property
     def _namespace(self):
         """Return the namespace to operate on."""
         return self._get_config_or_relation_data("service-namespace", self.model.name)
 
-    @property
+    @functools.cached_property
     def _retry_errors(self):
         """Return the retry-errors setting from config or relation."""
         retry = self._get_config_or_relation_data("retry-errors", "")
@@ -197,12 +265,12 @@ class _ConfigOrRelation(object):
         ]
         return " ".join([x.strip() for x in retry.split(",") if x.strip() in accepted_values])
 
-    @property
+    @functools.cached_property
     def _service_hostname(self):
         """Return the hostname for the service we're connecting to."""
         return self._get_config_or_relation_data("service-hostname", "")
 
-    @property
+    @functools.cached_property
     def _service_name(self):
         """Return the name of the service we're connecting to."""
         # NOTE: If the charm has multiple relations, use the service name given by the relation
@@ -211,7 +279,7 @@ class _ConfigOrRelation(object):
             return self._get_relation_data_or_config("service-name", "")
         return self._get_config_or_relation_data("service-name", "")
 
-    @property
+    @functools.cached_property
     def _service_port(self):
         """Return the port for the service we're connecting to."""
         # NOTE: If the charm has multiple relations, use the service port given by the relation.
@@ -219,7 +287,7 @@ class _ConfigOrRelation(object):
             return int(self._get_relation_data_or_config("service-port", 0))
         return int(self._get_relation_data_or_config("service-port", 0))
 
-    @property
+    @functools.cached_property
     def _path_routes(self):
         """Return the path routes to use for the k8s ingress."""
         # NOTE: If the charm has multiple relations, use the path routes given by the relation
@@ -228,7 +296,7 @@ class _ConfigOrRelation(object):
             return self._get_relation_data_or_config("path-routes", "/").split(",")
         return self._get_config_or_relation_data("path-routes", "/").split(",")
 
-    @property
+    @functools.cached_property
     def _session_cookie_max_age(self):
         """Return the session-cookie-max-age to use for k8s ingress."""
         session_cookie_max_age = self._get_config_or_relation_data("session-cookie-max-age", 0)
@@ -237,33 +305,36 @@ class _ConfigOrRelation(object):
         # Don't return "0" which would evaluate to True.
         return ""
 
-    @property
+    @functools.cached_property
     def _tls_secret_name(self):
         """Return the tls-secret-name to use for k8s ingress (if any)."""
         return self._get_config_or_relation_data("tls-secret-name", "")
 
-    @property
+    @functools.cached_property
     def _whitelist_source_range(self):
         """Return the whitelist-source-range config option."""
         return self._get_config("whitelist-source-range")
 
     def _get_k8s_service(self):
-        """Get a K8s service definition."""
-        return kubernetes.client.V1Service(
-            api_version="v1",
-            kind="Service",
-            metadata=kubernetes.client.V1ObjectMeta(name=self._k8s_service_name),
-            spec=kubernetes.client.V1ServiceSpec(
-                selector={"app.kubernetes.io/name": self._service_name},
-                ports=[
-                    kubernetes.client.V1ServicePort(
-                        name="tcp-{}".format(self._service_port),
-                        port=self._service_port,
-                        target_port=self._service_port,
-                    )
+        """Get a K8s service definition.
+
+        This is a plain dict rather than a V1Service, as it's only ever serialized.
+        """
+        return {
+            "apiVersion": "v1",
+            "kind": "Service",
+            "metadata": {"name": self._k8s_service_name},
+            "spec": {
+                "selector": {"app.kubernetes.io/name": self._service_name},
+                "ports": [
+                    {
+                        "name": f"tcp-{self._service_port}",
+                        "port": self._service_port,
+                        "targetPort": self._service_port,
+                    }
                 ],
-            ),
-        )
+            },
+        }
 
     def _get_k8s_ingress(self):
         """Get a K8s ingress definition."""
@@ -306,26 +377,19 @@ class _ConfigOrRelation(object):
             if self._limit_whitelist:
                 annotations["nginx.ingress.kubernetes.io/limit-whitelist"] = self._limit_whitelist
         if self._owasp_modsecurity_crs:
-            annotations["nginx.ingress.kubernetes.io/enable-modsecurity"] = "true"
-            annotations["nginx.ingress.kubernetes.io/enable-owasp-modsecurity-crs"] = "true"
-            annotations[
-                "nginx.ingress.kubernetes.io/modsecurity-snippet"
-            ] = "SecRuleEngine On\nInclude /etc/nginx/owasp-modsecurity-crs/nginx-modsecurity.conf"
+            annotations.update(_OWASP_MODSECURITY_CRS_ANNOTATIONS)
         if self._retry_errors:
             annotations["nginx.ingress.kubernetes.io/proxy-next-upstream"] = self._retry_errors
         if self._rewrite_enabled:
             annotations["nginx.ingress.kubernetes.io/rewrite-target"] = self._rewrite_target
         if self._session_cookie_max_age:
-            annotations["nginx.ingress.kubernetes.io/affinity"] = "cookie"
-            annotations["nginx.ingress.kubernetes.io/affinity-mode"] = "balanced"
-            annotations["nginx.ingress.kubernetes.io/session-cookie-change-on-failure"] = "true"
+            annotations.update(_SESSION_COOKIE_ANNOTATIONS)
             annotations[
                 "nginx.ingress.kubernetes.io/session-cookie-max-age"
             ] = self._session_cookie_max_age
             annotations["nginx.ingress.kubernetes.io/session-cookie-name"] = "{}_AFFINITY".format(
                 self._service_name.upper()
             )
-            annotations["nginx.ingress.kubernetes.io/session-cookie-samesite"] = "Lax"
         if self._tls_secret_name:
             spec.tls = [
                 kubernetes.client.V1IngressTLS(
@@ -354,12 +418,16 @@ class _ConfigOrRelation(object):
 class NginxIngressCharm(CharmBase):
     """Charm the service."""
 
-    _authed = False
     on = IngressCharmEvents()
+    _stored = StoredState()
 
     def __init__(self, *args):
         super().__init__(*args)
+        # Digests of the last applied definition of each service and ingress, by name.
+        self._stored.set_default(service_hashes={}, ingress_hashes={}, last_reconcile_hash=None)
         self.framework.observe(self.on.config_changed, self._on_config_changed)
+        self.framework.observe(self.on.upgrade_charm, self._on_upgrade_charm)
+        self.framework.observe(self.on.leader_elected, self._on_leader_elected)
         self.framework.observe(self.on.describe_ingresses_action, self._describe_ingresses_action)
 
         # 'ingress' relation handling.
@@ -368,14 +436,21 @@ class NginxIngressCharm(CharmBase):
         self.framework.observe(self.on.ingress_available, self._on_config_changed)
         self.framework.observe(self.on.ingress_broken, self._on_ingress_broken)
 
+        # Kubernetes authentication and API clients, set up on first use and reused for the rest
+        # of the hook so that all requests share a single connection pool.
+        self._authed = False
+        self._api_client = None
+        self._core_api = None
+        self._networking_api = None
+
     @property
     def _all_config_or_relations(self):
         """Get all configuration and relation data."""
-        all_relations = self.model.relations["ingress"] or [None]
-        multiple_rels = self._multiple_relations
+        relations = self.model.relations["ingress"]
+        multiple_rels = len(relations) > 1
         return [
             _ConfigOrRelation(self.model, self.config, relation, multiple_rels)
-            for relation in all_relations
+            for relation in relations or [None]
         ]
 
     @property
@@ -394,8 +469,7 @@ class NginxIngressCharm(CharmBase):
 
     def _describe_ingresses_action(self, event):
         """Handle the 'describe-ingresses' action."""
-        self.k8s_auth()
-        api = _networking_v1_api()
+        api = self._get_networking_v1_api()
 
         ingresses = api.list_namespaced_ingress(namespace=self._namespace)
         event.set_results({"ingresses": ingresses})
@@ -409,20 +483,60 @@ class NginxIngressCharm(CharmBase):
 
         self._authed = True
 
+    def _get_api_client(self):
+        """Return the shared kubernetes ApiClient, authenticating first if needed."""
+        self.k8s_auth()
+        if self._api_client is None:
+            configuration = kubernetes.client.Configuration.get_default_copy()
+            configuration.connection_pool_maxsize = CONNECTION_POOL_MAXSIZE
+            self._api_client = _ApiClient(configuration)
+            # urllib3 reads the default socket options when its classes are defined, so they
+            # have to be given to the connection pools.
+            pool_manager = self._api_client.rest_client.pool_manager
+            pool_manager.connection_pool_kw["socket_options"] = _tcp_keepalive_socket_options()
+        return self._api_client
+
+    def _get_core_v1_api(self):
+        """Return the cached v1 k8s API."""
+        if self._core_api is None:
+            self._core_api = _core_v1_api(self._get_api_client())
+        return self._core_api
+
+    def _get_networking_v1_api(self):
+        """Return the cached v1 networking API."""
+        if self._networking_api is None:
+            self._networking_api = _networking_v1_api(self._get_api_client())
+        return self._networking_api
+
+    def _server_side_apply_body(self, body):
+        """Serialize a resource definition for a server-side apply request."""
+        # The client only sends non-JSON content types as-is if given a string.
+        return json.dumps(self._get_api_client().sanitize_for_serialization(body), sort_keys=True)
+
+    def _list_service_names(self):
+        """Return the names of the services in our namespace."""
+        api = self._get_core_v1_api()
+        services = api.list_namespaced_service(namespace=self._namespace)
+        return {x.metadata.name for x in services.items}
+
+    def _list_ingress_names(self):
+        """Return the names of the ingresses in our namespace."""
+        api = self._get_networking_v1_api()
+        ingresses = api.list_namespaced_ingress(namespace=self._namespace)
+        return {x.metadata.name for x in ingresses.items}
+
     def _report_service_ips(self) -> list[str]:
         """Report on service IP(s) and return a list of them."""
-        self.k8s_auth()
-        api = _core_v1_api()
+        api = self._get_core_v1_api()
         services = api.list_namespaced_service(namespace=self._namespace)
-        all_k8s_service_names = [rel._k8s_service_name for rel in self._all_config_or_relations]
+        all_k8s_service_names = {rel._k8s_service_name for rel in self._all_config_or_relations}
         return [
             x.spec.cluster_ip for x in services.items if x.metadata.name in all_k8s_service_names
         ]
 
     def _report_ingress_ips(self) -> list[str]:
         """Report on ingress IP(s) and return a list of them."""
-        self.k8s_auth()
-        api = _networking_v1_api()
+        api = self._get_networking_v1_api()
 
         # Wait up to `interval * count` seconds for ingress IPs.
         count, interval = 100, 1
@@ -447,51 +561,66 @@ class NginxIngressCharm(CharmBase):
 
     def _define_services(self):
         """Create or update the services in Kubernetes from multiple ingress relations."""
+        # We only need to know what exists if we've applied services before, to skip unchanged
+        # services that are still there.
+        service_names = self._list_service_names() if self._stored.service_hashes else set()
         for conf_or_rel in self._all_config_or_relations:
             # By default, the service name is "". If there is no value set, we might be missing
             # the needed relation data from that relation at this moment. Skip creating a Service
             # for the current relation; it will be created when the relation data is set.
             if self._has_required_fields(conf_or_rel):
-                self._define_service(conf_or_rel)
+                self._define_service(conf_or_rel, service_names)
 
-    def _define_service(self, conf_or_rel: _ConfigOrRelation):
-        """Create or update a service in kubernetes."""
-        self.k8s_auth()
-        api = _core_v1_api()
-        body = conf_or_rel._get_k8s_service()
-        services = api.list_namespaced_service(namespace=self._namespace)
-        if conf_or_rel._k8s_service_name in [x.metadata.name for x in services.items]:
-            api.patch_namespaced_service(
-                name=conf_or_rel._k8s_service_name,
-                namespace=self._namespace,
-                body=body,
-            )
-            LOGGER.info(
-                "Service updated in namespace %s with name %s",
-                self._namespace,
-                conf_or_rel._service_name,
-            )
-        else:
-            api.create_namespaced_service(
-                namespace=self._namespace,
-                body=body,
-            )
+    def _define_service(self, conf_or_rel: _ConfigOrRelation, service_names):
+        """Create or update a service in kubernetes, using server-side apply.
+
+        :param conf_or_rel: The config or relation to define the service for.
+        :param service_names: The names of the services already in the namespace. The service
+            is not applied again if it's among them and its definition hasn't changed.
+        """
+        service_name = conf_or_rel._k8s_service_name
+        body = self._server_side_apply_body(conf_or_rel._get_k8s_service())
+        body_hash = _body_hash(body)
+        if (
+            service_name in service_names
+            and self._stored.service_hashes.get(service_name) == body_hash
+        ):
             LOGGER.info(
-                "Service created in namespace %s with name %s",
+                "Service unchanged in namespace %s with name %s",
                 self._namespace,
                 conf_or_rel._service_name,
             )
+            return
+
+        api = self._get_core_v1_api()
+        api.patch_namespaced_service(
+            name=service_name,
+            namespace=self._namespace,
+            body=body,
+            field_manager=FIELD_MANAGER,
+            force=True,
+        )
+        self._stored.service_hashes[service_name] = body_hash
+        LOGGER.info(
+            "Service applied in namespace %s with name %s",
+            self._namespace,
+            conf_or_rel._service_name,
+        )
 
     def _remove_service(self, conf_or_rel: _ConfigOrRelation):
         """Remove the created service in kubernetes."""
-        self.k8s_auth()
-        api = _core_v1_api()
-        services = api.list_namespaced_service(namespace=self._namespace)
-        if conf_or_rel._k8s_service_name in [x.metadata.name for x in services.items]:
+        api = self._get_core_v1_api()
+        # Let the API server do the filtering; we only care about this one service.
+        services = api.list_namespaced_service(
+            namespace=self._namespace,
+            field_selector="metadata.name={}".format(conf_or_rel._k8s_service_name),
+        )
+        if services.items:
             api.delete_namespaced_service(
                 name=conf_or_rel._k8s_service_name,
                 namespace=self._namespace,
             )
+            self._stored.service_hashes.pop(conf_or_rel._k8s_service_name, None)
             LOGGER.info(
                 "Service deleted in namespace %s with name %s",
                 self._namespace,
@@ -516,14 +645,13 @@ class NginxIngressCharm(CharmBase):
             if len(defaults) > 1:
                 LOGGER.warning(
                     "Multiple default ingress classes defined, declining to choose between them. "
-                    "They are: {}".format(" ".join(sorted(defaults)))
+                    "They are: %s",
+                    " ".join(sorted(defaults)),
                 )
                 return
 
             ingress_class = defaults[0]
-            LOGGER.info(
-                "Using ingress class {} as it is the cluster's default".format(ingress_class)
-            )
+            LOGGER.info("Using ingress class %s as it is the cluster's default", ingress_class)
 
         body.spec.ingress_class_name = ingress_class
 
@@ -562,13 +690,15 @@ class NginxIngressCharm(CharmBase):
             excluded_ingress = conf_or_rel._get_k8s_ingress()
 
             # The Kubernetes Ingress Resources we're creating only has 1 rule per hostname.
-            used_hostnames = [ingress.spec.rules[0].host for ingress in ingresses]
+            used_hostnames = {ingress.spec.rules[0].host for ingress in ingresses}
             for rule in excluded_ingress.spec.rules:
                 if rule.host not in used_hostnames:
                     self._remove_ingress(self._ingress_name(rule.host))
 
+        # As with services, only list the ingresses if we may be able to skip unchanged ones.
+        ingress_names = self._list_ingress_names() if self._stored.ingress_hashes else set()
         for ingress in ingresses:
-            self._define_ingress(ingress)
+            self._define_ingress(ingress, ingress_names)
 
     def _process_ingresses(self, ingresses):
         """Process ingresses, or raise an exception if there are unresolvable conflicts."""
@@ -664,42 +794,53 @@ class NginxIngressCharm(CharmBase):
             spec=new_spec,
         )
 
-    def _define_ingress(self, body):
-        """Create or update an ingress in kubernetes."""
-        self.k8s_auth()
-        api = _networking_v1_api()
+    def _define_ingress(self, body, ingress_names):
+        """Create or update an ingress in kubernetes, using server-side apply.
+
+        :param body: The ingress definition.
+        :param ingress_names: The names of the ingresses already in the namespace. The ingress
+            is not applied again if it's among them and its definition hasn't changed.
+        """
+        api = self._get_networking_v1_api()
         self._look_up_and_set_ingress_class(api, body)
         ingress_name = body.metadata.name
-        ingresses = api.list_namespaced_ingress(namespace=self._namespace)
-        if ingress_name in [x.metadata.name for x in ingresses.items]:
-            api.replace_namespaced_ingress(
-                name=ingress_name,
-                namespace=self._namespace,
-                body=body,
-            )
+        apply_body = self._server_side_apply_body(body)
+        body_hash = _body_hash(apply_body)
+        if (
+            ingress_name in ingress_names
+            and self._stored.ingress_hashes.get(ingress_name) == body_hash
+        ):
             LOGGER.info(
-                "Ingress updated in namespace %s with name %s",
-                self._namespace,
-                ingress_name,
-            )
-        else:
-            api.create_namespaced_ingress(
-                namespace=self._namespace,
-                body=body,
-            )
-            LOGGER.info(
-                "Ingress created in namespace %s with name %s",
+                "Ingress unchanged in namespace %s with name %s",
                 self._namespace,
                 ingress_name,
             )
+            return
+
+        api.patch_namespaced_ingress(
+            name=ingress_name,
+            namespace=self._namespace,
+            body=apply_body,
+            field_manager=FIELD_MANAGER,
+            force=True,
+        )
+        self._stored.ingress_hashes[ingress_name] = body_hash
+        LOGGER.info(
+            "Ingress applied in namespace %s with name %s",
+            self._namespace,
+            ingress_name,
+        )
 
     def _remove_ingress(self, ingress_name):
         """Remove ingress resource."""
-        self.k8s_auth()
-        api = _networking_v1_api()
-        ingresses = api.list_namespaced_ingress(namespace=self._namespace)
-        if ingress_name in [x.metadata.name for x in ingresses.items]:
+        api = self._get_networking_v1_api()
+        ingresses = api.list_namespaced_ingress(
+            namespace=self._namespace,
+            field_selector="metadata.name={}".format(ingress_name),
+        )
+        if ingresses.items:
             api.delete_namespaced_ingress(ingress_name, self._namespace)
+            self._stored.ingress_hashes.pop(ingress_name, None)
             LOGGER.info(
                 "Ingress deleted in namespace %s with name %s",
                 self._namespace,
@@ -711,12 +852,22 @@ class NginxIngressCharm(CharmBase):
         msg = ""
         # We only want to do anything here if we're the leader to avoid
         # collision if we've scaled out this application.
-        svc_names = [conf_or_rel._service_name for conf_or_rel in self._all_config_or_relations]
+        conf_or_rels = self._all_config_or_relations
+        svc_names = [conf_or_rel._service_name for conf_or_rel in conf_or_rels]
         print(svc_names)
-        if self.unit.is_leader() and any(svc_names):
+        if not self.unit.is_leader():
+            # Another unit may change the resources while we aren't the leader.
+            self._forget_applied_state()
+        elif any(svc_names):
             try:
-                self._define_services()
-                self._define_ingresses()
+                # The resources only need defining if the config or the relation data changed
+                # since the last successful reconcile. The IPs are always reported, as they may
+                # not have been assigned yet.
+                reconcile_hash = self._reconcile_hash(conf_or_rels)
+                if reconcile_hash != self._stored.last_reconcile_hash:
+                    self._define_services()
+                    self._define_ingresses()
+                    self._stored.last_reconcile_hash = reconcile_hash
                 msgs = []
                 ingress_ips = self._report_ingress_ips()
                 if ingress_ips:
@@ -750,6 +901,127 @@ class NginxIngressCharm(CharmBase):
                 return
         self.unit.status = ActiveStatus(msg)
 
+    def _on_leader_elected(self, _):
+        """Handle the leader elected event."""
+        # The resources may have been changed by the previous leader.
+        self._forget_applied_state()
+
+    def _forget_applied_state(self):
+        """Forget what was applied, so that the resources are all applied again."""
+        self._stored.service_hashes = {}
+        self._stored.ingress_hashes = {}
+        self._stored.last_reconcile_hash = None
+
+    def _on_upgrade_charm(self, _):
+        """Handle the upgrade charm event."""
+        # A new charm revision may define the resources differently, so apply them again.
+        self._forget_applied_state()
+        if self.unit.is_leader():
+            try:
+                self._migrate_field_managers()
+            except kubernetes.client.exceptions.ApiException as e:
+                if e.status != 403:
+                    raise
+                LOGGER.error(
+                    "Insufficient permissions to migrate the field managers of the k8s resources"
+                )
+
+    def _migrate_field_managers(self):
+        """Hand the fields of our services and ingresses over to server-side apply.
+
+        Fields of resources defined before the charm used server-side apply are owned by
+        LEGACY_FIELD_MANAGER. Fields it shares with FIELD_MANAGER wouldn't be removed when
+        they're left out of an apply request, so have FIELD_MANAGER own them instead.
+        """
+        self.k8s_auth()
+        # The managed fields are changed with a JSON patch, not a server-side apply request.
+        api_client = kubernetes.client.ApiClient()
+        core_api = _core_v1_api(api_client)
+        networking_api = _networking_v1_api(api_client)
+
+        conf_or_rels = list(filter(self._has_required_fields, self._all_config_or_relations))
+        service_names = {conf_or_rel._k8s_service_name for conf_or_rel in conf_or_rels}
+        ingress_names = {
+            self._ingress_name(rule.host)
+            for conf_or_rel in conf_or_rels
+            for rule in conf_or_rel._get_k8s_ingress().spec.rules
+        }
+
+        services = core_api.list_namespaced_service(namespace=self._namespace)
+        for service in services.items:
+            if service.metadata.name in service_names:
+                self._migrate_field_manager(
+                    api_client, core_api.patch_namespaced_service, service, "v1"
+                )
+        ingresses = networking_api.list_namespaced_ingress(namespace=self._namespace)
+        for ingress in ingresses.items:
+            if ingress.metadata.name in ingress_names:
+                self._migrate_field_manager(
+                    api_client,
+                    networking_api.patch_namespaced_ingress,
+                    ingress,
+                    "networking.k8s.io/v1",
+                )
+
+    def _migrate_field_manager(self, api_client, patch, resource, api_version):
+        """Have FIELD_MANAGER apply the fields LEGACY_FIELD_MANAGER owns in a resource, if any.
+
+        Simply dropping the legacy entries wouldn't do, as the API server hands fields nobody
+        owns to a new manager on the next apply request.
+
+        :param api_client: The ApiClient used to serialize the managed fields.
+        :param patch: The API method patching the resource.
+        :param resource: The resource, as read from kubernetes.
+        :param api_version: The API version we apply the resource with.
+        """
+        managed_fields = resource.metadata.managed_fields or []
+        fields = {}
+        kept_entries = []
+        migrated = False
+        for entry in managed_fields:
+            if entry.manager == LEGACY_FIELD_MANAGER and entry.operation == "Update":
+                _merge_fields(fields, entry.fields_v1 or {})
+                migrated = True
+            elif entry.manager == FIELD_MANAGER and entry.operation == "Apply":
+                _merge_fields(fields, entry.fields_v1 or {})
+            else:
+                kept_entries.append(entry)
+        if not migrated:
+            return
+
+        value = api_client.sanitize_for_serialization(kept_entries)
+        value.append(
+            {
+                "apiVersion": api_version,
+                "fieldsType": "FieldsV1",
+                "fieldsV1": fields,
+                "manager": FIELD_MANAGER,
+                "operation": "Apply",
+            }
+        )
+        patch(
+            name=resource.metadata.name,
+            namespace=self._namespace,
+            body=[{"op": "replace", "path": "/metadata/managedFields", "value": value}],
+        )
+        LOGGER.info(
+            "Migrated field manager %s in namespace %s for %s",
+            LEGACY_FIELD_MANAGER,
+            self._namespace,
+            resource.metadata.name,
+        )
+
+    def _reconcile_hash(self, conf_or_rels):
+        """Return a digest of the config and relation data the resources are defined from."""
+        state = json.dumps(
+            {
+                "config": dict(self.config),
+                "relations": [conf_or_rel._relation_data for conf_or_rel in conf_or_rels],
+            },
+            sort_keys=True,
+        )
+        return _body_hash(state)
+
     def _on_ingress_broken(self, event):
         """Handle the ingress broken event."""
         conf_or_rel = _ConfigOrRelation(self.model, {}, event.relation, self._multiple_relations)
@@ -760,6 +1032,7 @@ class NginxIngressCharm(CharmBase):
                 # (they were needed by the event relation).
                 self._define_ingresses(excluded_relation=event.relation)
                 self._remove_service(conf_or_rel)
+                self._stored.last_reconcile_hash = None
             except kubernetes.client.exceptions.ApiException as e:
                 if e.status == 403:
                     LOGGER.error(
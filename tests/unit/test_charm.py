@@ -1,6 +1,8 @@
 # Copyright 2022 Canonical Ltd.
 # See LICENSE file for licensing details.
 
+import json
+import socket
 import unittest
 from unittest import mock
 from unittest.mock import MagicMock, patch
@@ -9,8 +11,9 @@ import kubernetes
 import kubernetes.client
 from ops.model import ActiveStatus, BlockedStatus
 from ops.testing import Harness
+from urllib3.connection import HTTPConnection
 
-from charm import NginxIngressCharm
+from charm import CONNECTION_POOL_MAXSIZE, NginxIngressCharm, _ConfigOrRelation
 
 
 class TestCharm(unittest.TestCase):
@@ -88,6 +91,40 @@ class TestCharm(unittest.TestCase):
             ),
         )
 
+    @patch("charm.NginxIngressCharm._report_ingress_ips")
+    @patch("charm.NginxIngressCharm._report_service_ips")
+    @patch("charm.NginxIngressCharm._define_ingresses")
+    @patch("charm.NginxIngressCharm._define_services")
+    def test_config_changed_unchanged_state(
+        self, _define_services, _define_ingresses, _report_service_ips, _report_ingress_ips
+    ):
+        """
+        arrange: given the harnessed charm, reconciled from its config before the ingress had an IP
+        act: when config-changed fires again without any config or relation change
+        assert: the resources aren't defined again, but the status reports the new ingress IP.
+        """
+        self.harness.set_leader(True)
+        _report_ingress_ips.return_value = []
+        _report_service_ips.return_value = ["10.0.1.13"]
+        self.harness.update_config(
+            {"service-hostname": "gunic.orn", "service-name": "gunicorn", "service-port": 80}
+        )
+        self.assertEqual(_define_services.call_count, 1)
+        self.assertEqual(self.harness.charm.unit.status, ActiveStatus("Service IP(s): 10.0.1.13"))
+
+        _report_ingress_ips.return_value = ["10.0.1.12"]
+        self.harness.charm._on_config_changed(None)
+
+        self.assertEqual(_define_services.call_count, 1)
+        self.assertEqual(_define_ingresses.call_count, 1)
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            ActiveStatus("Ingress IP(s): 10.0.1.12, Service IP(s): 10.0.1.13"),
+        )
+
+        self.harness.update_config({"service-port": 8080})
+        self.assertEqual(_define_services.call_count, 2)
+
     def test_get_ingress_relation_data(self):
         """Test for getting our ingress relation data."""
         # Confirm we don't have any relation data yet in the relevant properties
@@ -268,6 +305,7 @@ class TestCharm(unittest.TestCase):
         # Test if we set the value we get the correct annotations and the
         # correct charm property.
         self.harness.update_config({"owasp-modsecurity-crs": True})
+        conf_or_rel = self.harness.charm._all_config_or_relations[0]
         self.assertEqual(conf_or_rel._owasp_modsecurity_crs, True)
         result_dict = conf_or_rel._get_k8s_ingress().to_dict()
         expected = {
@@ -289,11 +327,14 @@ class TestCharm(unittest.TestCase):
         self.assertEqual(conf_or_rel._retry_errors, "")
         # Test we deal with spaces or not spaces properly.
         self.harness.update_config({"retry-errors": "error, timeout, http_502, http_503"})
+        conf_or_rel = self.harness.charm._all_config_or_relations[0]
         self.assertEqual(conf_or_rel._retry_errors, "error timeout http_502 http_503")
         self.harness.update_config({"retry-errors": "error,timeout,http_502,http_503"})
+        conf_or_rel = self.harness.charm._all_config_or_relations[0]
         self.assertEqual(conf_or_rel._retry_errors, "error timeout http_502 http_503")
         # Test unknown value.
         self.harness.update_config({"retry-errors": "error,timeout,http_502,http_418"})
+        conf_or_rel = self.harness.charm._all_config_or_relations[0]
         self.assertEqual(conf_or_rel._retry_errors, "error timeout http_502")
 
     def test_service_port(self):
@@ -318,6 +359,31 @@ class TestCharm(unittest.TestCase):
         conf_or_rel = self.harness.charm._all_config_or_relations[0]
         self.assertEqual(conf_or_rel._service_port, 88)
 
+    def test_config_or_relation_properties_cached(self):
+        """
+        arrange: given a _ConfigOrRelation object
+        act: when the config changes after a property was read
+        assert: the object keeps the value it first computed, and a new object sees the change.
+        """
+        self.harness.update_config({"service-port": 80})
+        conf_or_rel = self.harness.charm._all_config_or_relations[0]
+        self.assertEqual(conf_or_rel._service_port, 80)
+        self.harness.update_config({"service-port": 8080})
+        self.assertEqual(conf_or_rel._service_port, 80)
+        conf_or_rel = self.harness.charm._all_config_or_relations[0]
+        self.assertEqual(conf_or_rel._service_port, 8080)
+
+    def test_config_or_relation_without_app(self):
+        """
+        arrange: given a _ConfigOrRelation object for a relation with no remote application
+        act: when its properties are read
+        assert: the relation data is treated as empty rather than raising an error.
+        """
+        relation = MagicMock(app=None, data={})
+        conf_or_rel = _ConfigOrRelation(self.harness.model, {}, relation, False)
+        self.assertEqual(conf_or_rel._relation_data, {})
+        self.assertEqual(conf_or_rel._ingress_name, "-ingress")
+
     def test_service_hostname(self):
         """Test the service-hostname property."""
         # First set via config.
@@ -349,6 +415,7 @@ class TestCharm(unittest.TestCase):
         # Confirm if we set this to 0 we get a False value, e.g. it doesn't
         # return a string of "0" which would be evaluated to True.
         self.harness.update_config({"session-cookie-max-age": 0})
+        conf_or_rel = self.harness.charm._all_config_or_relations[0]
         self.assertFalse(conf_or_rel._session_cookie_max_age)
         # Now set via the relation.
         relation_id = self.harness.add_relation("ingress", "gunicorn")
@@ -434,8 +501,8 @@ class TestCharm(unittest.TestCase):
 
         mock_def_ingress.assert_has_calls(
             [
-                mock.call(base_ingress),
-                mock.call(ingress_lish),
+                mock.call(base_ingress, mock.ANY),
+                mock.call(ingress_lish, mock.ANY),
             ]
         )
 
@@ -490,6 +557,7 @@ class TestCharm(unittest.TestCase):
         self.assertEqual(result_dict["metadata"]["annotations"], expected)
 
         self.harness.update_config({"rewrite-enabled": False})
+        conf_or_rel = self.harness.charm._all_config_or_relations[0]
         result_dict = conf_or_rel._get_k8s_ingress().to_dict()
         expected = {
             "nginx.ingress.kubernetes.io/proxy-body-size": "20m",
@@ -505,6 +573,7 @@ class TestCharm(unittest.TestCase):
             "nginx.ingress.kubernetes.io/rewrite-target": "/test-target",
             "nginx.ingress.kubernetes.io/ssl-redirect": "false",
         }
+        conf_or_rel = self.harness.charm._all_config_or_relations[0]
         result_dict = conf_or_rel._get_k8s_ingress().to_dict()
         self.assertEqual(result_dict["metadata"]["annotations"], expected)
 
@@ -722,6 +791,7 @@ class TestCharm(unittest.TestCase):
                 ]
             ),
         )
+        conf_or_rel = self.harness.charm._all_config_or_relations[0]
         self.assertEqual(conf_or_rel._get_k8s_ingress(), expected)
         self.harness.update_config({"additional-hostnames": ""})
         # Test multiple paths
@@ -773,6 +843,7 @@ class TestCharm(unittest.TestCase):
             ),
         )
         self.harness.update_config({"path-routes": "/admin,/portal"})
+        conf_or_rel = self.harness.charm._all_config_or_relations[0]
         self.assertEqual(conf_or_rel._get_k8s_ingress(), expected)
         self.harness.update_config({"path-routes": "/"})
         # Test with TLS.
@@ -817,6 +888,7 @@ class TestCharm(unittest.TestCase):
             ),
         )
         self.harness.update_config({"tls-secret-name": "gunicorn_tls"})
+        conf_or_rel = self.harness.charm._all_config_or_relations[0]
         self.assertEqual(conf_or_rel._get_k8s_ingress(), expected)
         # Test ingress-class, max_body_size, retry_http_errors and
         # session-cookie-max-age config options.
@@ -873,9 +945,11 @@ class TestCharm(unittest.TestCase):
                 ]
             ),
         )
+        conf_or_rel = self.harness.charm._all_config_or_relations[0]
         self.assertEqual(conf_or_rel._get_k8s_ingress(), expected)
         # Test limit-whitelist on its own makes no change.
         self.harness.update_config({"limit-whitelist": "10.0.0.0/16"})
+        conf_or_rel = self.harness.charm._all_config_or_relations[0]
         self.assertEqual(conf_or_rel._get_k8s_ingress(), expected)
         # And if we set limit-rps we get both. Unset other options to minimize output.
         self.harness.update_config(
@@ -924,29 +998,195 @@ class TestCharm(unittest.TestCase):
                 ]
             ),
         )
+        conf_or_rel = self.harness.charm._all_config_or_relations[0]
         self.assertEqual(conf_or_rel._get_k8s_ingress(), expected)
 
     def test_get_k8s_service(self):
         """Test getting our definition of a k8s service."""
         self.harness.disable_hooks()
         self.harness.update_config({"service-name": "gunicorn", "service-port": 80})
-        expected = kubernetes.client.V1Service(
+        expected = {
+            "apiVersion": "v1",
+            "kind": "Service",
+            "metadata": {"name": "gunicorn-service"},
+            "spec": {
+                "selector": {"app.kubernetes.io/name": "gunicorn"},
+                "ports": [{"name": "tcp-80", "port": 80, "targetPort": 80}],
+            },
+        }
+        conf_or_rel = self.harness.charm._all_config_or_relations[0]
+        self.assertEqual(conf_or_rel._get_k8s_service(), expected)
+
+    @patch("charm._networking_v1_api")
+    @patch("charm._core_v1_api")
+    @patch("charm.NginxIngressCharm.k8s_auth")
+    def test_api_clients_cached(self, mock_k8s_auth, mock_core_api, mock_net_api):
+        """
+        arrange: given the harnessed charm
+        act: when we request the kubernetes APIs more than once
+        assert: each API is only created once, sharing the same ApiClient with a sized pool.
+        """
+        core_api = self.harness.charm._get_core_v1_api()
+        net_api = self.harness.charm._get_networking_v1_api()
+
+        self.assertIs(self.harness.charm._get_core_v1_api(), core_api)
+        self.assertIs(self.harness.charm._get_networking_v1_api(), net_api)
+        mock_core_api.assert_called_once_with(self.harness.charm._api_client)
+        mock_net_api.assert_called_once_with(self.harness.charm._api_client)
+        self.assertEqual(
+            self.harness.charm._api_client.configuration.connection_pool_maxsize,
+            CONNECTION_POOL_MAXSIZE,
+        )
+
+    @patch("charm.NginxIngressCharm.k8s_auth")
+    def test_api_client_enables_tcp_keepalive(self, _):
+        """
+        arrange: given the harnessed charm
+        act: when a connection to the kubernetes API is created
+        assert: TCP keepalive is enabled on it, on top of the default socket options.
+        """
+        pool_manager = self.harness.charm._get_api_client().rest_client.pool_manager
+
+        connection = pool_manager.connection_from_url("https://10.0.0.1:443")._new_conn()
+
+        self.assertIn((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1), connection.socket_options)
+        for socket_option in HTTPConnection.default_socket_options:
+            self.assertIn(socket_option, connection.socket_options)
+
+    @patch("charm._networking_v1_api")
+    def test_removed_annotation_not_applied(self, mock_api):
+        """
+        arrange: given the harnessed charm with an ingress applied with owasp-modsecurity-crs
+        act: when owasp-modsecurity-crs is disabled
+        assert: the modsecurity annotations are left out of the ingress applied again.
+        """
+        self.harness.disable_hooks()
+        self.harness.charm._authed = True
+        self.harness.update_config(
+            {
+                "owasp-modsecurity-crs": True,
+                "service-hostname": "foo.in.ternal",
+                "service-name": "gunicorn",
+                "service-port": 80,
+            }
+        )
+        mock_apply_ingress = mock_api.return_value.patch_namespaced_ingress
+        self.harness.charm._define_ingresses()
+        applied = json.loads(mock_apply_ingress.call_args.kwargs["body"])
+        self.assertIn(
+            "nginx.ingress.kubernetes.io/enable-modsecurity", applied["metadata"]["annotations"]
+        )
+
+        self.harness.update_config({"owasp-modsecurity-crs": False})
+        self.harness.charm._define_ingresses()
+
+        applied = json.loads(mock_apply_ingress.call_args.kwargs["body"])
+        self.assertEqual(mock_apply_ingress.call_count, 2)
+        self.assertFalse(
+            any("modsecurity" in annotation for annotation in applied["metadata"]["annotations"])
+        )
+
+    @patch("charm._networking_v1_api")
+    @patch("charm._core_v1_api")
+    def test_upgrade_charm_migrates_legacy_field_manager(self, mock_core_api, mock_net_api):
+        """
+        arrange: given the harnessed charm, with a service and ingresses defined before it used
+            server-side apply
+        act: when the charm is upgraded
+        assert: the fields owned by the legacy field manager are owned by our field manager
+            instead, in our service and ingress only.
+        """
+        self.harness.disable_hooks()
+        self.harness.set_leader(True)
+        self.harness.charm._authed = True
+        self.harness.update_config(
+            {"service-hostname": "foo.in.ternal", "service-name": "gunicorn", "service-port": 80}
+        )
+        legacy_fields = {"f:spec": {"f:ports": {'k:{"port":80,"protocol":"TCP"}': {".": {}}}}}
+        legacy_entry = kubernetes.client.V1ManagedFieldsEntry(
             api_version="v1",
-            kind="Service",
-            metadata=kubernetes.client.V1ObjectMeta(name="gunicorn-service"),
-            spec=kubernetes.client.V1ServiceSpec(
-                selector={"app.kubernetes.io/name": "gunicorn"},
-                ports=[
-                    kubernetes.client.V1ServicePort(
-                        name="tcp-80",
-                        port=80,
-                        target_port=80,
-                    )
-                ],
+            fields_type="FieldsV1",
+            fields_v1=legacy_fields,
+            manager="OpenAPI-Generator",
+            operation="Update",
+        )
+        apply_entry = kubernetes.client.V1ManagedFieldsEntry(
+            api_version="networking.k8s.io/v1",
+            fields_type="FieldsV1",
+            fields_v1={"f:spec": {"f:rules": {}}},
+            manager="nginx-ingress-integrator",
+            operation="Apply",
+        )
+        status_entry = kubernetes.client.V1ManagedFieldsEntry(
+            manager="nginx-ingress-controller", operation="Update"
+        )
+        mock_core_api.return_value.list_namespaced_service.return_value.items = [
+            kubernetes.client.V1Service(
+                metadata=kubernetes.client.V1ObjectMeta(
+                    name="gunicorn-service", managed_fields=[legacy_entry]
+                )
+            )
+        ]
+        mock_net_api.return_value.list_namespaced_ingress.return_value.items = [
+            kubernetes.client.V1Ingress(
+                metadata=kubernetes.client.V1ObjectMeta(
+                    name="foo-in-ternal-ingress",
+                    managed_fields=[legacy_entry, apply_entry, status_entry],
+                )
             ),
+            kubernetes.client.V1Ingress(
+                metadata=kubernetes.client.V1ObjectMeta(
+                    name="other-ingress", managed_fields=[legacy_entry]
+                )
+            ),
+        ]
+
+        self.harness.charm._on_upgrade_charm(None)
+
+        mock_core_api.return_value.patch_namespaced_service.assert_called_once_with(
+            name="gunicorn-service",
+            namespace=self.harness.charm._namespace,
+            body=[
+                {
+                    "op": "replace",
+                    "path": "/metadata/managedFields",
+                    "value": [
+                        {
+                            "apiVersion": "v1",
+                            "fieldsType": "FieldsV1",
+                            "fieldsV1": legacy_fields,
+                            "manager": "nginx-ingress-integrator",
+                            "operation": "Apply",
+                        }
+                    ],
+                }
+            ],
+        )
+        mock_net_api.return_value.patch_namespaced_ingress.assert_called_once_with(
+            name="foo-in-ternal-ingress",
+            namespace=self.harness.charm._namespace,
+            body=[
+                {
+                    "op": "replace",
+                    "path": "/metadata/managedFields",
+                    "value": [
+                        {"manager": "nginx-ingress-controller", "operation": "Update"},
+                        {
+                            "apiVersion": "networking.k8s.io/v1",
+                            "fieldsType": "FieldsV1",
+                            "fieldsV1": {"f:spec": {**legacy_fields["f:spec"], "f:rules": {}}},
+                            "manager": "nginx-ingress-integrator",
+                            "operation": "Apply",
+                        },
+                    ],
+                }
+            ],
+        )
+        # The managed fields read from kubernetes are left as they were.
+        self.assertEqual(
+            legacy_entry.fields_v1,
+            {"f:spec": {"f:ports": {'k:{"port":80,"protocol":"TCP"}': {".": {}}}}},
         )
-        conf_or_rel = self.harness.charm._all_config_or_relations[0]
-        self.assertEqual(conf_or_rel._get_k8s_service(), expected)
 
 
 INGRESS_CLASS_PUBLIC_DEFAULT = kubernetes.client.V1beta1IngressClass(
@@ -1059,6 +1299,18 @@ class TestCharmLookUpAndSetIngressClass(unittest.TestCase):
         self.assertIsNone(body.spec.ingress_class_name)
 
 
+def _apply_kwargs(name, namespace, body):
+    """Return the arguments expected for a server-side apply of the given resource."""
+    serialized = kubernetes.client.ApiClient().sanitize_for_serialization(body)
+    return {
+        "name": name,
+        "namespace": namespace,
+        "body": json.dumps(serialized, sort_keys=True),
+        "field_manager": "nginx-ingress-integrator",
+        "force": True,
+    }
+
+
 class TestCharmMultipleRelations(unittest.TestCase):
     def setUp(self):
         """Setup the harness object."""
@@ -1183,18 +1435,18 @@ class TestCharmMultipleRelations(unittest.TestCase):
         self._add_ingress_relation("gunicorn", rel_data)
 
         conf_or_rels = self.harness.charm._all_config_or_relations
-        mock_create_service = mock_api.return_value.create_namespaced_service
-        mock_create_service.assert_called_once_with(
-            namespace=self.harness.charm._namespace,
-            body=conf_or_rels[0]._get_k8s_service(),
+        mock_apply_service = mock_api.return_value.patch_namespaced_service
+        mock_apply_service.assert_called_once_with(
+            **_apply_kwargs(
+                conf_or_rels[0]._k8s_service_name,
+                self.harness.charm._namespace,
+                conf_or_rels[0]._get_k8s_service(),
+            )
         )
 
-        # Reset the create service mock, and add a second relation. Expect the first service to
-        # be updated, and the second one to be created.
-        mock_create_service.reset_mock()
-        mock_service1 = MagicMock()
-        mock_service1.metadata.name = "gunicorn-service"
-        mock_list_services.return_value.items = [mock_service1]
+        # Reset the apply service mock, and add a second relation. Expect both services to be
+        # applied.
+        mock_apply_service.reset_mock()
 
         rel_data = {
             "service-name": "funicorn",
@@ -1204,31 +1456,164 @@ class TestCharmMultipleRelations(unittest.TestCase):
         self._add_ingress_relation("funicorn", rel_data)
 
         conf_or_rels = self.harness.charm._all_config_or_relations
-        mock_patch_service = mock_api.return_value.patch_namespaced_service
-        mock_patch_service.assert_called_once_with(
-            name=conf_or_rels[0]._k8s_service_name,
-            namespace=self.harness.charm._namespace,
-            body=conf_or_rels[0]._get_k8s_service(),
-        )
-        mock_create_service.assert_called_once_with(
-            namespace=self.harness.charm._namespace,
-            body=conf_or_rels[1]._get_k8s_service(),
+        self.assertEqual(
+            mock_apply_service.call_args_list,
+            [
+                mock.call(
+                    **_apply_kwargs(
+                        conf_or_rel._k8s_service_name,
+                        self.harness.charm._namespace,
+                        conf_or_rel._get_k8s_service(),
+                    )
+                )
+                for conf_or_rel in conf_or_rels
+            ],
         )
 
-        # Remove the first relation and assert that only the first service is removed.
-        mock_service2 = MagicMock()
-        mock_service2.metadata.name = "funicorn-service"
-        mock_list_services.return_value.items = [mock_service1, mock_service2]
+        # Remove the first relation and assert that only the first service is removed. The
+        # service is looked up by name, so only the matching one is returned.
+        mock_service1 = MagicMock()
+        mock_service1.metadata.name = "gunicorn-service"
+        mock_list_services.return_value.items = [mock_service1]
 
         relation = self.harness.charm.model.relations["ingress"][0]
         self.harness.charm.on.ingress_relation_broken.emit(relation)
 
+        mock_list_services.assert_called_with(
+            namespace=self.harness.charm._namespace,
+            field_selector="metadata.name=gunicorn-service",
+        )
+
         mock_delete_service = mock_api.return_value.delete_namespaced_service
         mock_delete_service.assert_called_once_with(
             name=conf_or_rels[0]._k8s_service_name,
             namespace=self.harness.charm._namespace,
         )
 
+    @patch("charm.NginxIngressCharm._report_ingress_ips")
+    @patch("charm.NginxIngressCharm._report_service_ips")
+    @patch("charm.NginxIngressCharm._define_ingresses")
+    @patch("charm._networking_v1_api")
+    @patch("charm._core_v1_api")
+    def test_unchanged_service_not_applied(
+        self, mock_api, mock_net_api, mock_define_ingresses, mock_report_ips, mock_ingress_ips
+    ):
+        """
+        arrange: given the harnessed charm with a service already applied
+        act: when the charm reconciles again without changes, and after an upgrade
+        assert: the service is only applied again if it changed, went missing, or after an
+            upgrade.
+        """
+        self.harness.set_leader(True)
+        self.harness.charm._authed = True
+        mock_report_ips.return_value = ["10.0.1.12"]
+        mock_ingress_ips.return_value = ""
+        mock_list_services = mock_api.return_value.list_namespaced_service
+        mock_list_services.return_value.items = []
+        mock_apply_service = mock_api.return_value.patch_namespaced_service
+
+        rel_data = {
+            "service-name": "gunicorn",
+            "service-hostname": "foo.in.ternal",
+            "service-port": "80",
+        }
+        self._add_ingress_relation("gunicorn", rel_data)
+        mock_apply_service.assert_called_once()
+
+        # The service exists and hasn't changed, so it's not applied again.
+        mock_apply_service.reset_mock()
+        mock_service = MagicMock()
+        mock_service.metadata.name = "gunicorn-service"
+        mock_list_services.return_value.items = [mock_service]
+        self.harness.update_config({"max-body-size": 30})
+        mock_apply_service.assert_not_called()
+
+        # If it went missing, it's applied again.
+        mock_list_services.return_value.items = []
+        self.harness.update_config({"max-body-size": 40})
+        mock_apply_service.assert_called_once()
+
+        # And after an upgrade, everything is applied again.
+        mock_apply_service.reset_mock()
+        mock_list_services.return_value.items = [mock_service]
+        self.harness.charm.on.upgrade_charm.emit()
+        self.harness.update_config({"max-body-size": 50})
+        mock_apply_service.assert_called_once()
+
+    @patch("charm.NginxIngressCharm._report_ingress_ips")
+    @patch("charm.NginxIngressCharm._report_service_ips")
+    @patch("charm.NginxIngressCharm._define_ingresses")
+    @patch("charm.NginxIngressCharm._define_services")
+    def test_reconcile_after_leadership_change(
+        self, mock_define_services, mock_define_ingresses, mock_report_ips, mock_ingress_ips
+    ):
+        """
+        arrange: given the harnessed charm which reconciled from relation data as leader
+        act: when the relation data changes and changes back while we aren't the leader, and
+            we become leader again
+        assert: the next config-changed reconciles again.
+        """
+        self.harness.set_leader(True)
+        mock_report_ips.return_value = ["10.0.1.12"]
+        mock_ingress_ips.return_value = ""
+        rel_data = {
+            "service-name": "gunicorn",
+            "service-hostname": "foo.in.ternal",
+            "service-port": "80",
+        }
+        relation_id = self._add_ingress_relation("gunicorn", rel_data)
+        mock_define_services.assert_called_once()
+
+        # Another unit is the leader, and reconciles the changed relation data.
+        mock_define_services.reset_mock()
+        self.harness.set_leader(False)
+        self.harness.update_relation_data(relation_id, "gunicorn", {"service-port": "8080"})
+        self.harness.update_relation_data(relation_id, "gunicorn", {"service-port": "80"})
+        mock_define_services.assert_not_called()
+
+        self.harness.set_leader(True)
+        self.harness.update_config()
+
+        mock_define_services.assert_called_once()
+        mock_define_ingresses.assert_called()
+
+    @patch("charm.NginxIngressCharm._report_ingress_ips")
+    @patch("charm.NginxIngressCharm._report_service_ips")
+    @patch("charm.NginxIngressCharm._define_ingresses")
+    @patch("charm._core_v1_api")
+    def test_service_applied_after_leadership_change(
+        self, mock_api, mock_define_ingresses, mock_report_ips, mock_ingress_ips
+    ):
+        """
+        arrange: given the harnessed charm which applied a service as leader
+        act: when another unit changes the service while we aren't the leader, and we become
+            leader again with the original config
+        assert: the service is applied again.
+        """
+        self.harness.set_leader(True)
+        self.harness.charm._authed = True
+        mock_report_ips.return_value = ["10.0.1.12"]
+        mock_ingress_ips.return_value = ""
+        mock_service = MagicMock()
+        mock_service.metadata.name = "gunicorn-service"
+        mock_api.return_value.list_namespaced_service.return_value.items = [mock_service]
+        mock_apply_service = mock_api.return_value.patch_namespaced_service
+        self.harness.update_config(
+            {"service-hostname": "foo.in.ternal", "service-name": "gunicorn", "service-port": 80}
+        )
+        mock_apply_service.assert_called_once()
+
+        # Another unit is the leader, and applies the service with the new port.
+        mock_apply_service.reset_mock()
+        self.harness.set_leader(False)
+        self.harness.update_config({"service-port": 8080})
+        mock_apply_service.assert_not_called()
+
+        self.harness.set_leader(True)
+        self.harness.update_config({"service-port": 80})
+
+        mock_apply_service.assert_called_once()
+
     @patch("charm.NginxIngressCharm._report_ingress_ips")
     @patch("charm.NginxIngressCharm._report_service_ips")
     @patch("charm.NginxIngressCharm._remove_service")
@@ -1263,17 +1648,20 @@ class TestCharmMultipleRelations(unittest.TestCase):
         rel_id1 = self._add_ingress_relation("gunicorn", rel_data)
 
         conf_or_rels = self.harness.charm._all_config_or_relations
-        mock_create_ingress = mock_api.return_value.create_namespaced_ingress
+        mock_apply_ingress = mock_api.return_value.patch_namespaced_ingress
 
         # Since we only have one relation, the merged ingress rule should be the same as before
         # the merge.
-        mock_create_ingress.assert_called_once_with(
-            namespace=self.harness.charm._namespace,
-            body=conf_or_rels[0]._get_k8s_ingress(),
+        mock_apply_ingress.assert_called_once_with(
+            **_apply_kwargs(
+                conf_or_rels[0]._ingress_name,
+                self.harness.charm._namespace,
+                conf_or_rels[0]._get_k8s_ingress(),
+            )
         )
 
-        # Reset the create ingress mock, and add a second relation.
-        mock_create_ingress.reset_mock()
+        # Reset the apply ingress mock, and add a second relation.
+        mock_apply_ingress.reset_mock()
         mock_ingress1 = MagicMock()
         mock_ingress1.metadata.name = "foo-in-ternal-ingress"
         mock_list_ingress.return_value.items = [mock_ingress1]
@@ -1287,48 +1675,43 @@ class TestCharmMultipleRelations(unittest.TestCase):
         }
         rel_id2 = self._add_ingress_relation("funicorn", rel_data)
 
-        # We're expecting that the K8s Ingress Resource will be replaced by one that contains
-        # paths from both relations. A new one should not have been created.
-        mock_create_ingress.assert_not_called()
-
+        # We're expecting that the K8s Ingress Resource will be updated to contain the paths from
+        # both relations. A second one should not have been applied.
         conf_or_rels = self.harness.charm._all_config_or_relations
         expected_body = conf_or_rels[0]._get_k8s_ingress()
         second_body = conf_or_rels[1]._get_k8s_ingress()
 
         expected_body.spec.rules[0].http.paths.extend(second_body.spec.rules[0].http.paths)
-        mock_replace_ingress = mock_api.return_value.replace_namespaced_ingress
-        mock_replace_ingress.assert_called_once_with(
-            name=conf_or_rels[0]._ingress_name,
-            namespace=self.harness.charm._namespace,
-            body=expected_body,
+        mock_apply_ingress.assert_called_once_with(
+            **_apply_kwargs(
+                conf_or_rels[0]._ingress_name, self.harness.charm._namespace, expected_body
+            )
         )
 
         # Remove the first relation and assert that the Kubernetes Ingress Resource was updated
         # and not removed.
-        mock_create_ingress.reset_mock()
-        mock_replace_ingress.reset_mock()
+        mock_apply_ingress.reset_mock()
 
         self.harness.remove_relation(rel_id1)
 
-        # Assert that the ingress was replaced, not deleted (we still have a relation).
+        # Assert that the ingress was updated, not deleted (we still have a relation).
         mock_delete_ingress = mock_api.return_value.delete_namespaced_ingress
         mock_delete_ingress.assert_not_called()
 
         conf_or_rels = self.harness.charm._all_config_or_relations
-        mock_replace_ingress.assert_called_once_with(
-            name=conf_or_rels[0]._ingress_name,
-            namespace=self.harness.charm._namespace,
-            body=second_body,
+        mock_apply_ingress.assert_called_once_with(
+            **_apply_kwargs(
+                conf_or_rels[0]._ingress_name, self.harness.charm._namespace, second_body
+            )
         )
 
         # Remove the second relation. This should cause the K8s Ingress Resource to be removed,
         # since we no longer have any relations needing it.
-        mock_replace_ingress.reset_mock()
+        mock_apply_ingress.reset_mock()
         mock_delete_ingress.reset_mock()
         self.harness.remove_relation(rel_id2)
 
-        mock_create_ingress.assert_not_called()
-        mock_replace_ingress.assert_not_called()
+        mock_apply_ingress.assert_not_called()
         mock_delete_ingress.assert_called_once_with(
             conf_or_rels[0]._ingress_name,
             self.harness.charm._namespace,
@@ -1370,15 +1753,18 @@ class TestCharmMultipleRelations(unittest.TestCase):
         # Since we only have one relation, the merged ingress rule should be the same as before
         # the merge.
         conf_or_rels = self.harness.charm._all_config_or_relations
-        mock_create_ingress = mock_api.return_value.create_namespaced_ingress
-        mock_create_ingress.assert_called_once_with(
-            namespace=self.harness.charm._namespace,
-            body=conf_or_rels[0]._get_k8s_ingress(),
+        mock_apply_ingress = mock_api.return_value.patch_namespaced_ingress
+        mock_apply_ingress.assert_called_once_with(
+            **_apply_kwargs(
+                conf_or_rels[0]._ingress_name,
+                self.harness.charm._namespace,
+                conf_or_rels[0]._get_k8s_ingress(),
+            )
         )
 
-        # Reset the create ingress mock, and add a second relation with a different
+        # Reset the apply ingress mock, and add a second relation with a different
         # service-hostname. A different K8s Ingress Resource should be created.
-        mock_create_ingress.reset_mock()
+        mock_apply_ingress.reset_mock()
         mock_ingress1 = MagicMock()
         mock_ingress1.metadata.name = "foo-in-ternal-ingress"
         mock_list_ingress.return_value.items = [mock_ingress1]
@@ -1390,44 +1776,36 @@ class TestCharmMultipleRelations(unittest.TestCase):
         }
         rel_id2 = self._add_ingress_relation("punicorn", rel_data)
 
-        # We're expecting that the first K8s Ingress Resource will be updated, but it will not
-        # change, and that a new K8s Ingress Resource will be created for the new relation,
-        # since it has a different service-hostname.
+        # We're expecting that the first K8s Ingress Resource, which exists and hasn't changed,
+        # will not be applied again, and that a new K8s Ingress Resource will be created for the
+        # new relation, since it has a different service-hostname.
         conf_or_rels = self.harness.charm._all_config_or_relations
-        mock_create_ingress.assert_called_once_with(
-            namespace=self.harness.charm._namespace,
-            body=conf_or_rels[1]._get_k8s_ingress(),
-        )
-        mock_replace_ingress = mock_api.return_value.replace_namespaced_ingress
-        mock_replace_ingress.assert_called_once_with(
-            name=conf_or_rels[0]._ingress_name,
-            namespace=self.harness.charm._namespace,
-            body=conf_or_rels[0]._get_k8s_ingress(),
+        mock_apply_ingress.assert_called_once_with(
+            **_apply_kwargs(
+                conf_or_rels[1]._ingress_name,
+                self.harness.charm._namespace,
+                conf_or_rels[1]._get_k8s_ingress(),
+            )
         )
 
         # Remove the first relation and assert that only the first ingress is removed.
         mock_ingress2 = MagicMock()
         mock_ingress2.metadata.name = "lish-in-ternal-ingress"
         mock_list_ingress.return_value.items = [mock_ingress1, mock_ingress2]
-        mock_create_ingress.reset_mock()
-        mock_replace_ingress.reset_mock()
+        mock_apply_ingress.reset_mock()
         self.harness.remove_relation(rel_id1)
 
-        # Assert that only the ingress for the first relation was removed.
+        # Assert that only the ingress for the first relation was removed. The second one hasn't
+        # changed, so it's not applied again.
         mock_delete_ingress = mock_api.return_value.delete_namespaced_ingress
         mock_delete_ingress.assert_called_once_with(
             conf_or_rels[0]._ingress_name,
             self.harness.charm._namespace,
         )
-        mock_create_ingress.assert_not_called()
-        mock_replace_ingress.assert_called_once_with(
-            name=conf_or_rels[1]._ingress_name,
-            namespace=self.harness.charm._namespace,
-            body=conf_or_rels[1]._get_k8s_ingress(),
-        )
+        mock_apply_ingress.assert_not_called()
 
         # Remove the second relation.
-        mock_replace_ingress.reset_mock()
+        mock_apply_ingress.reset_mock()
         mock_delete_ingress.reset_mock()
         self.harness.remove_relation(rel_id2)
 
@@ -1435,8 +1813,7 @@ class TestCharmMultipleRelations(unittest.TestCase):
             conf_or_rels[1]._ingress_name,
             self.harness.charm._namespace,
         )
-        mock_create_ingress.assert_not_called()
-        mock_replace_ingress.assert_not_called()
+        mock_apply_ingress.assert_not_called()
 
     @patch("charm.NginxIngressCharm._report_service_ips")
     @patch("charm.NginxIngressCharm.k8s_auth")
@@ -1467,7 +1844,7 @@ class TestCharmMultipleRelations(unittest.TestCase):
 
         expected_result = ["127.0.0.1"]
 
-        result = NginxIngressCharm._report_ingress_ips(NginxIngressCharm)
+        result = self.harness.charm._report_ingress_ips()
 
         self.assertEqual(result, expected_result)
 
@@ -1498,7 +1875,7 @@ class TestCharmMultipleRelations(unittest.TestCase):
 
         expected_result = []
 
-        result = NginxIngressCharm._report_ingress_ips(NginxIngressCharm)
+        result = self.harness.charm._report_ingress_ips()
 
         self.assertEqual(result, expected_result)
 
@@ -1539,24 +1916,26 @@ class TestCharmMultipleRelations(unittest.TestCase):
 
         # It should create 2 different Ingress Resources, since we have an additional hostname.
         conf_or_rels = self.harness.charm._all_config_or_relations
-        mock_create_ingress = mock_api.return_value.create_namespaced_ingress
+        mock_apply_ingress = mock_api.return_value.patch_namespaced_ingress
         first_body = conf_or_rels[0]._get_k8s_ingress()
         first_body.spec.rules = [first_body.spec.rules[0]]
         second_body = conf_or_rels[0]._get_k8s_ingress()
         second_body.metadata.name = "lish-in-ternal-ingress"
         second_body.spec.rules = [second_body.spec.rules[1]]
         second_body.spec.tls[0].hosts = ["lish.in.ternal"]
-        mock_create_ingress.assert_has_calls(
+        namespace = self.harness.charm._namespace
+        self.assertEqual(
+            mock_apply_ingress.call_args_list,
             [
-                mock.call(namespace=self.harness.charm._namespace, body=first_body),
-                mock.call(namespace=self.harness.charm._namespace, body=second_body),
-            ]
+                mock.call(**_apply_kwargs("foo-in-ternal-ingress", namespace, first_body)),
+                mock.call(**_apply_kwargs("lish-in-ternal-ingress", namespace, second_body)),
+            ],
         )
 
-        # Reset the create ingress mock, and add a second relation with the service-hostname set
+        # Reset the apply ingress mock, and add a second relation with the service-hostname set
         # to the first relation's additional-hostname. A third K8s Ingress Resource should not
         # be created.
-        mock_create_ingress.reset_mock()
+        mock_apply_ingress.reset_mock()
         mock_ingress1 = MagicMock()
         mock_ingress1.metadata.name = "foo-in-ternal-ingress"
         mock_ingress2 = MagicMock()
@@ -1572,35 +1951,21 @@ class TestCharmMultipleRelations(unittest.TestCase):
         }
         self._add_ingress_relation("punicorn", rel_data)
 
-        # We're expecting that the first K8s Ingress Resource will be updated, but it will not
-        # change, and that the second K8s Ingress Resource will be updated to include the route
-        # from the second relation.
+        # We're expecting that the first K8s Ingress Resource will not be applied again, since
+        # it exists and hasn't changed, and that the second K8s Ingress Resource will be updated
+        # to include the route from the second relation.
         conf_or_rels = self.harness.charm._all_config_or_relations
-        mock_create_ingress.assert_not_called()
-
         second_rel_body = conf_or_rels[1]._get_k8s_ingress()
         second_body.spec.rules[0].http.paths.extend(second_rel_body.spec.rules[0].http.paths)
-        calls = [
-            mock.call(
-                name=conf_or_rels[0]._ingress_name,
-                namespace=self.harness.charm._namespace,
-                body=first_body,
-            ),
-            mock.call(
-                name=conf_or_rels[1]._ingress_name,
-                namespace=self.harness.charm._namespace,
-                body=second_body,
-            ),
-        ]
-        mock_replace_ingress = mock_api.return_value.replace_namespaced_ingress
-        mock_replace_ingress.assert_has_calls(calls)
+        mock_apply_ingress.assert_called_once_with(
+            **_apply_kwargs(conf_or_rels[1]._ingress_name, namespace, second_body)
+        )
 
         # Remove the first relation and assert that only the first ingress is removed.
         mock_ingress2 = MagicMock()
         mock_ingress2.metadata.name = "lish-in-ternal-ingress"
         mock_list_ingress.return_value.items = [mock_ingress1, mock_ingress2]
-        mock_create_ingress.reset_mock()
-        mock_replace_ingress.reset_mock()
+        mock_apply_ingress.reset_mock()
         self.harness.remove_relation(rel_id1)
 
         # Assert that only the ingress for the first relation was removed.
@@ -1609,11 +1974,12 @@ class TestCharmMultipleRelations(unittest.TestCase):
             conf_or_rels[0]._ingress_name,
             self.harness.charm._namespace,
         )
-        mock_create_ingress.assert_not_called()
-        mock_replace_ingress.assert_called_once_with(
-            name=conf_or_rels[1]._ingress_name,
-            namespace=self.harness.charm._namespace,
-            body=conf_or_rels[1]._get_k8s_ingress(),
+        mock_apply_ingress.assert_called_once_with(
+            **_apply_kwargs(
+                conf_or_rels[1]._ingress_name,
+                self.harness.charm._namespace,
+                conf_or_rels[1]._get_k8s_ingress(),
+            )
         )
 
     @patch("charm.NginxIngressCharm._report_ingress_ips")
@@ -1725,8 +2091,10 @@ class TestCharmMultipleRelations(unittest.TestCase):
         self.harness.update_relation_data(rel_id, "funicorn", rel_data)
 
         conf_or_rels = self.harness.charm._all_config_or_relations
-        mock_define_service.assert_has_calls([mock.call(mock.ANY), mock.call(mock.ANY)])
+        mock_define_service.assert_has_calls(
+            [mock.call(mock.ANY, mock.ANY), mock.call(mock.ANY, mock.ANY)]
+        )
         second_body = conf_or_rels[1]._get_k8s_ingress()
         expected_body = conf_or_rels[0]._get_k8s_ingress()
         expected_body.spec.rules[0].http.paths.extend(second_body.spec.rules[0].http.paths)
-        mock_define_ingress.assert_called_once_with(expected_body)
+        mock_define_ingress.assert_called_once_with(expected_body, mock.ANY)